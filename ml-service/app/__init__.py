@@ -1 +1,18 @@
 """ML Service package."""
+
+import os
+
+# Must be set before pydantic is imported anywhere: skips pydantic-core's
+# self-validation of every generated core schema, a significant share of
+# container cold-start time.
+os.environ.setdefault("PYDANTIC_SKIP_VALIDATING_CORE_SCHEMAS", "true")
+
+# Cap native thread pools before torch/OpenCV/MKL initialize them — each
+# sizes its pool to the full core count by default and they fight each
+# other (context-switch thrash) when image and video requests run
+# concurrently. Deployments can still override via the environment.
+_half_cores = str(max(1, (os.cpu_count() or 1) // 2))
+os.environ.setdefault("OMP_NUM_THREADS", _half_cores)
+os.environ.setdefault("MKL_NUM_THREADS", _half_cores)
+os.environ.setdefault("OMP_PROC_BIND", "close")
+os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact")
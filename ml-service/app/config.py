@@ -19,9 +19,17 @@ class Settings(BaseSettings):
     # Model settings
     model_name: str = "cnn_detection"
     device: str = "cpu"  # 'cpu' or 'cuda'
+    # Safetensors ResNet50 weight cache baked into the image by
+    # scripts/export_weights.py; empty = download via torchvision
+    weights_cache_path: str = ""
+    # Opt-in torch.compile for the FP32 model. Off by default: inductor's
+    # CPU backend generates and compiles C++ at runtime, and the slim
+    # production image ships without a C++ toolchain
+    torch_compile: bool = False
 
     # Processing limits
     max_image_size_mb: float = 10.0
+    max_video_size_mb: float = 200.0
     max_video_duration_seconds: int = 300  # 5 minutes
     max_frames_per_video: int = 20
 
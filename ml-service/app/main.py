@@ -4,10 +4,14 @@ ML Service - FastAPI Application
 Provides AI-generated image/video detection endpoints.
 """
 
+import hmac
+import os
 from contextlib import asynccontextmanager
+
+import torch
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from .config import get_settings
 from .models import CNNDetector
@@ -28,14 +32,44 @@ async def lifespan(app: FastAPI):
     """
     global detector
 
+    # Deferred imports: cv2 and httpx are needed from startup onward but
+    # not for the module import itself, keeping the app importable fast
+    import cv2
+    import httpx
+
     settings = get_settings()
 
+    # Cap torch/OpenCV thread pools (the OMP/MKL env defaults are set in
+    # app/__init__.py before the native libraries load). Half the cores for
+    # intra-op work leaves headroom for the event loop, the encode pool,
+    # and concurrent image/video requests; one interop thread avoids a
+    # second layer of torch-internal parallelism on top of that.
+    workers = max(1, (os.cpu_count() or 1) // 2)
+    torch.set_num_threads(workers)
+    torch.set_num_interop_threads(1)
+    cv2.setNumThreads(workers)
+
+    # One app-lifetime HTTP client so downloads reuse pooled connections
+    # and TLS sessions instead of paying DNS + handshake per request
+    app.state.http = httpx.AsyncClient(
+        timeout=settings.download_timeout_seconds,
+        limits=httpx.Limits(max_connections=100),
+    )
+
     # Load detector on startup
     print(f"Loading {settings.model_name} detector on {settings.device}...")
-    detector = CNNDetector(device=settings.device)
+    detector = CNNDetector(
+        device=settings.device,
+        weights_cache_path=settings.weights_cache_path,
+        torch_compile=settings.torch_compile,
+    )
     detector.load()
     print(f"Detector loaded successfully!")
 
+    # Start the micro-batching worker so concurrent detect requests share
+    # a single batched forward pass
+    await detector.start_batch_worker()
+
     # Set global references in routers
     set_image_detector(detector)
     set_health_detector(detector)
@@ -43,8 +77,10 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup on shutdown
+    await app.state.http.aclose()
     if detector is not None:
         print("Unloading detector...")
+        await detector.stop_batch_worker()
         detector.unload()
 
 
@@ -54,10 +90,19 @@ app = FastAPI(
     description="AI-generated content detection for images and videos",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson encodes the large base64 frame payloads far faster than the
+    # default json encoder
+    default_response_class=ORJSONResponse,
 )
 
-# CORS — restrict to known origins
+# Settings are immutable for the process lifetime, so bind the values the
+# auth middleware needs once at import time instead of re-reading (and
+# re-formatting the expected header) on every request
 settings = get_settings()
+_API_SECRET = settings.api_secret
+_EXPECTED_AUTH = f"Bearer {_API_SECRET}".encode()
+
+# CORS — restrict to known origins
 allowed_origins = [
     "https://www.real.press",
     "https://real.press",
@@ -78,18 +123,15 @@ async def auth_middleware(request: Request, call_next):
     Require Bearer token on /api/* routes when ML_API_SECRET is configured.
     Skip auth for health checks, root, and when no secret is set (dev mode).
     """
-    settings = get_settings()
-
     # Skip auth if no secret configured (dev mode)
-    if not settings.api_secret:
+    if not _API_SECRET:
         return await call_next(request)
 
     # Only protect /api/* routes — allow /health and / without auth
     if request.url.path.startswith("/api/"):
-        auth_header = request.headers.get("authorization", "")
-        expected = f"Bearer {settings.api_secret}"
+        auth_header = request.headers.get("authorization", "").encode()
 
-        if auth_header != expected:
+        if not hmac.compare_digest(auth_header, _EXPECTED_AUTH):
             return JSONResponse(
                 status_code=401,
                 content={"detail": "Unauthorized"},
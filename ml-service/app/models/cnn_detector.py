@@ -7,17 +7,27 @@ Based on the CNNDetection approach for detecting GAN-generated images.
 Reference: https://github.com/peterwang512/CNNDetection
 """
 
+import asyncio
+import math
+import os
+import threading
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from torchvision import transforms
-from torchvision.models import resnet50, ResNet50_Weights
 from PIL import Image
 import numpy as np
-from typing import Optional
+from typing import List, Optional
 
 from .base import BaseDetector, DetectionResult
 
+# Micro-batching parameters: requests arriving within the batch window are
+# coalesced into a single forward pass, so concurrent requests (and the
+# per-frame calls from video analysis) share one batched inference instead
+# of each paying for a batch=1 forward pass.
+BATCH_WINDOW_SECONDS = 0.005
+MAX_BATCH_SIZE = 8
+
 
 class CNNDetector(BaseDetector):
     """
@@ -28,34 +38,90 @@ class CNNDetector(BaseDetector):
     and add a simple classifier head.
     """
 
-    def __init__(self, device: str = "cpu", model_path: Optional[str] = None):
+    def __init__(
+        self,
+        device: str = "cpu",
+        model_path: Optional[str] = None,
+        weights_cache_path: Optional[str] = None,
+        torch_compile: bool = False,
+    ):
         """
         Initialize the CNN detector.
 
         Args:
             device: 'cpu' or 'cuda'
             model_path: Optional path to custom trained weights
+            weights_cache_path: Optional safetensors ResNet50 weight cache
+                (see scripts/export_weights.py); falls back to the
+                torchvision download when unset or missing
+            torch_compile: Attempt torch.compile on the FP32 model; requires
+                a C++ toolchain at runtime on CPU (see Settings.torch_compile)
         """
         self._device = torch.device(device)
         self._model: Optional[nn.Module] = None
         self._model_path = model_path
-        self._transform = self._get_transform()
+        self._weights_cache_path = weights_cache_path
+        self._torch_compile = torch_compile
+        # True when the classifier head ends in an nn.Sigmoid (custom
+        # trained heads); the MVP head emits a raw logit and the sigmoid is
+        # applied scalarly when scoring
+        self._head_has_sigmoid = False
+
+        # ImageNet normalization constants, prescaled to the 0-255 pixel
+        # range so normalization runs directly on uint8-derived values
+        self._mean = torch.tensor([0.485, 0.456, 0.406]).mul(255.0).reshape(1, 3, 1, 1)
+        self._std = torch.tensor([0.229, 0.224, 0.225]).mul(255.0).reshape(1, 3, 1, 1)
+
+        # Micro-batching queue of (input_tensor, future) pairs, drained by a
+        # single background task (see start_batch_worker).
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+        # Reusable staging buffer for batched inference: torch.cat writes
+        # each batch into it in place, so steady-state batching allocates
+        # nothing. On CUDA it is additionally pinned so host->device copies
+        # run asynchronously, with a dedicated stream letting the copy +
+        # inference of batch N overlap preprocessing of batch N+1.
+        self._staging = torch.empty(MAX_BATCH_SIZE, 3, 224, 224).to(
+            memory_format=torch.channels_last
+        )
+        self._infer_stream = None
+        if self._device.type == "cuda" and torch.cuda.is_available():
+            self._staging = self._staging.pin_memory()
+            self._infer_stream = torch.cuda.Stream(self._device)
+
+        # Per-thread resize destination buffers (preprocessing runs on
+        # executor threads), reused across calls via cv2.resize(dst=...)
+        self._resize_tls = threading.local()
 
     @property
     def name(self) -> str:
         return "cnn_detection"
 
-    def _get_transform(self) -> transforms.Compose:
-        """Get image preprocessing transforms."""
-        return transforms.Compose(
-            [
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(
-                    mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]
-                ),
-            ]
+    def _preprocess(self, image: Image.Image) -> torch.Tensor:
+        """
+        Resize and normalize an RGB image into a [1, 3, 224, 224] tensor.
+
+        Single fused path: one cv2 resize over the pixels, then an in-place
+        normalize on the float tensor. Avoids the three intermediate buffers
+        (and per-channel Python dispatch) of the PIL Resize/ToTensor/Normalize
+        chain.
+        """
+        import cv2  # Deferred: keeps cv2 off the app-import critical path
+
+        # Resize into a per-thread preallocated destination; under load the
+        # fresh 224x224x3 output array per call is pure allocator churn
+        dst = getattr(self._resize_tls, "buf", None)
+        if dst is None:
+            dst = self._resize_tls.buf = np.empty((224, 224, 3), dtype=np.uint8)
+        cv2.resize(
+            np.asarray(image), (224, 224), dst=dst, interpolation=cv2.INTER_AREA
         )
+        tensor = torch.from_numpy(dst).permute(2, 0, 1).unsqueeze(0).float()
+        tensor = tensor.sub_(self._mean).div_(self._std)
+        # Match the model's channels-last memory format to avoid a relayout
+        # inside the first convolution
+        return tensor.to(memory_format=torch.channels_last)
 
     def _create_model(self) -> nn.Module:
         """
@@ -65,18 +131,52 @@ class CNNDetector(BaseDetector):
         For MVP, we use the pretrained features as a reasonable baseline.
         A production system would use weights fine-tuned on AI-generated images.
         """
-        # Load pretrained ResNet50
-        model = resnet50(weights=ResNet50_Weights.IMAGENET1K_V2)
+        # Deferred import: torchvision adds noticeable import time and is
+        # only needed once, when the model is first built
+        from torchvision.models import resnet50, ResNet50_Weights
+
+        # Load pretrained ResNet50. Prefer the baked-in safetensors cache:
+        # load_file mmaps the weight file so pages are demand-paged into the
+        # model tensors (assign=True avoids an extra copy), skipping the
+        # torchvision download + pickle.load on every container boot.
+        model = None
+        if self._weights_cache_path and os.path.exists(self._weights_cache_path):
+            try:
+                from safetensors.torch import load_file
 
-        # Replace the final fully connected layer for binary classification
+                model = resnet50(weights=None)
+                state_dict = load_file(
+                    self._weights_cache_path, device=str(self._device)
+                )
+                model.load_state_dict(state_dict, assign=True)
+            except Exception as e:
+                print(
+                    f"Warning: Could not load weight cache from {self._weights_cache_path}: {e}"
+                )
+                model = None
+
+        if model is None:
+            model = resnet50(weights=ResNet50_Weights.IMAGENET1K_V2)
+
+        # Replace the final fully connected layer for binary classification.
+        # The MVP path (no custom weights) uses a single Linear emitting a
+        # raw logit — the old Linear-ReLU-Dropout-Linear-Sigmoid stack added
+        # two extra matmuls and three module dispatches per inference for
+        # untrained layers; the sigmoid is applied scalarly when scoring.
+        # Custom trained weights keep the full head they were trained with.
         num_features = model.fc.in_features
-        model.fc = nn.Sequential(
-            nn.Linear(num_features, 256),
-            nn.ReLU(),
-            nn.Dropout(0.5),
-            nn.Linear(256, 1),
-            nn.Sigmoid(),
-        )
+        if self._model_path:
+            model.fc = nn.Sequential(
+                nn.Linear(num_features, 256),
+                nn.ReLU(),
+                nn.Dropout(0.5),
+                nn.Linear(256, 1),
+                nn.Sigmoid(),
+            )
+            self._head_has_sigmoid = True
+        else:
+            model.fc = nn.Linear(num_features, 1)
+            self._head_has_sigmoid = False
 
         return model
 
@@ -99,6 +199,79 @@ class CNNDetector(BaseDetector):
         self._model = self._model.to(self._device)
         self._model.eval()
 
+        # On CPU, convert the backbone to int8 so convolutions run as SIMD
+        # integer dot products instead of bandwidth-bound FP32 GEMMs
+        quantized = False
+        if self._device.type == "cpu":
+            try:
+                self._model = self._quantize_for_cpu(self._model)
+                quantized = True
+            except Exception as e:
+                print(f"Warning: int8 quantization failed, staying on FP32: {e}")
+
+        # Channels-last NHWC layout maps convolutions onto the fast GEMM
+        # paths even in eager mode
+        self._model = self._model.to(memory_format=torch.channels_last)
+
+        # Opt-in torch.compile (ML_TORCH_COMPILE=true). Defaults off:
+        # inductor's CPU backend generates C++ and needs a toolchain at
+        # runtime, which the slim production image doesn't ship, and dynamo
+        # on this torch version can't trace the packed int8 modules of the
+        # quantized backbone — so it only applies to the FP32 path in
+        # environments that explicitly enable it. The batch dimension is
+        # compiled dynamic so one warmup pass covers every micro-batch size
+        # instead of recompiling per shape.
+        if self._torch_compile and not quantized:
+            eager_model = self._model
+            try:
+                model = torch.compile(
+                    eager_model, mode="reduce-overhead", dynamic=True
+                )
+                with torch.no_grad():
+                    for batch_size in (1, MAX_BATCH_SIZE):
+                        model(
+                            torch.zeros(
+                                batch_size, 3, 224, 224, device=self._device
+                            ).to(memory_format=torch.channels_last)
+                        )
+                self._model = model
+            except Exception as e:
+                print(
+                    f"Warning: torch.compile optimization failed, using eager model: {e}"
+                )
+                self._model = eager_model
+
+    def _quantize_for_cpu(self, model: nn.Module) -> nn.Module:
+        """
+        Statically quantize the backbone to int8 with FX graph mode PTQ.
+
+        Int8 halves activation memory bandwidth and uses the wider integer
+        SIMD lanes (VNNI where available), which typically triples ResNet50
+        CPU throughput and cuts the model footprint from ~100 MB to ~25 MB.
+        The classifier head is kept in FP32 to preserve score precision.
+        """
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        torch.backends.quantized.engine = "fbgemm"
+
+        # Keep the small FC head (with its Sigmoid) in FP32
+        qconfig_mapping = get_default_qconfig_mapping("fbgemm").set_module_name(
+            "fc", None
+        )
+
+        example_inputs = (torch.randn(1, 3, 224, 224),)
+        prepared = prepare_fx(model, qconfig_mapping, example_inputs)
+
+        # Calibrate observers on normalized synthetic inputs. We have no
+        # labeled calibration set in the MVP; inputs spanning the normalized
+        # pixel range are enough to set reasonable activation scales.
+        with torch.no_grad():
+            for _ in range(8):
+                prepared(torch.randn(2, 3, 224, 224))
+
+        return convert_fx(prepared)
+
     def is_loaded(self) -> bool:
         """Check if model is loaded."""
         return self._model is not None
@@ -127,12 +300,12 @@ class CNNDetector(BaseDetector):
             image = image.convert("RGB")
 
         # Preprocess image
-        input_tensor = self._transform(image).unsqueeze(0).to(self._device)
+        input_tensor = self._preprocess(image).to(self._device)
 
         # Run inference
         with torch.no_grad():
             output = self._model(input_tensor)
-            score = output.item()
+            score = self._to_score(output.item())
 
         # Calculate confidence based on how far from 0.5 the score is
         # Scores near 0.5 indicate uncertainty
@@ -140,18 +313,157 @@ class CNNDetector(BaseDetector):
 
         return DetectionResult(score=score, confidence=confidence, model_name=self.name)
 
+    async def start_batch_worker(self) -> None:
+        """Start the background micro-batching task (idempotent)."""
+        if self._batch_task is not None:
+            return
+
+        self._batch_queue = asyncio.Queue()
+        self._batch_task = asyncio.get_running_loop().create_task(self._batch_worker())
+
+    async def stop_batch_worker(self) -> None:
+        """Stop the background micro-batching task."""
+        if self._batch_task is None:
+            return
+
+        self._batch_task.cancel()
+        try:
+            await self._batch_task
+        except asyncio.CancelledError:
+            pass
+
+        self._batch_task = None
+        self._batch_queue = None
+
+    async def detect_async(self, image: Image.Image) -> DetectionResult:
+        """
+        Detect if an image is AI-generated, batching concurrent requests.
+
+        Preprocesses the image, enqueues the tensor for the batch worker,
+        and awaits the result. Falls back to the synchronous path when the
+        batch worker is not running.
+
+        Args:
+            image: PIL Image to analyze
+
+        Returns:
+            DetectionResult with score (0=human, 1=AI) and confidence
+        """
+        if not self.is_loaded():
+            self.load()
+
+        if self._batch_queue is None:
+            return self.detect(image)
+
+        # Ensure RGB mode
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # Preprocess off the event loop — the resize/normalize is CPU-bound
+        loop = asyncio.get_running_loop()
+        input_tensor = await loop.run_in_executor(None, self._preprocess, image)
+
+        future: asyncio.Future = loop.create_future()
+        await self._batch_queue.put((input_tensor, future))
+
+        return await future
+
+    async def _batch_worker(self) -> None:
+        """
+        Drain the batch queue and run coalesced forward passes.
+
+        Waits for the first request, then collects additional requests for up
+        to BATCH_WINDOW_SECONDS (or until MAX_BATCH_SIZE), stacks them into a
+        single [B, 3, 224, 224] batch, and fans results back out to the
+        waiting futures.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            tensor, future = await self._batch_queue.get()
+            batch: List[torch.Tensor] = [tensor]
+            futures: List[asyncio.Future] = [future]
+
+            deadline = loop.time() + BATCH_WINDOW_SECONDS
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    tensor, future = await asyncio.wait_for(
+                        self._batch_queue.get(), timeout
+                    )
+                except asyncio.TimeoutError:
+                    break
+                batch.append(tensor)
+                futures.append(future)
+
+            try:
+                # Cat into the preallocated staging buffer (pinned on CUDA)
+                # instead of allocating a fresh batch tensor each time
+                input_batch = self._staging[: len(batch)]
+                torch.cat(batch, dim=0, out=input_batch)
+                # Run the forward pass in the thread pool so the event loop
+                # keeps accepting connections and decoding request bodies
+                # while inference runs (torch releases the GIL in its
+                # kernels)
+                outputs = await loop.run_in_executor(
+                    None, self._run_inference, input_batch
+                )
+            except Exception as e:
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(e)
+                continue
+
+            for f, output in zip(futures, outputs):
+                if f.done():
+                    continue
+                score = self._to_score(output.item())
+                f.set_result(
+                    DetectionResult(
+                        score=score,
+                        confidence=self._calculate_confidence(score),
+                        model_name=self.name,
+                    )
+                )
+
+    def _to_score(self, raw: float) -> float:
+        """Map a raw head output to a 0-1 score (scalar sigmoid for logits)."""
+        if self._head_has_sigmoid:
+            return raw
+        return 1.0 / (1.0 + math.exp(-raw))
+
+    def _run_inference(self, input_batch: torch.Tensor) -> torch.Tensor:
+        """
+        Run a no-grad forward pass on a host-resident batch (called from
+        the executor thread).
+
+        On CUDA the non-blocking copy from pinned memory and the forward
+        pass are issued on a dedicated stream, so they overlap with the
+        next batch being preprocessed on the default stream; results come
+        back to the CPU in one transfer.
+        """
+        with torch.no_grad():
+            if self._infer_stream is not None:
+                with torch.cuda.stream(self._infer_stream):
+                    x = input_batch.to(self._device, non_blocking=True)
+                    output = self._model(x)
+                self._infer_stream.synchronize()
+                return output.cpu()
+            return self._model(input_batch.to(self._device))
+
     def _calculate_confidence(self, score: float) -> float:
         """
         Calculate confidence based on score distance from decision boundary.
 
         Scores very close to 0.5 indicate low confidence.
         Scores near 0 or 1 indicate high confidence.
-        """
-        # Distance from 0.5 (decision boundary)
-        distance = abs(score - 0.5) * 2  # Normalize to 0-1
 
-        # Apply sigmoid-like scaling to emphasize high-confidence predictions
-        # This gives more weight to predictions that are very sure
-        confidence = 0.5 + 0.5 * (distance**0.7)
-
-        return min(max(confidence, 0.3), 0.95)  # Clamp between 0.3 and 0.95
+        Runs once per image/frame on the hot path, so the distance
+        normalization, power scaling, and 0.3-0.95 clamp are folded into a
+        single expression with a branchless-style clamp instead of a chain
+        of intermediate float ops.
+        """
+        c = 0.5 + 0.5 * math.pow(2.0 * abs(score - 0.5), 0.7)
+        return 0.3 if c < 0.3 else 0.95 if c > 0.95 else c
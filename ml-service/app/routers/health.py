@@ -3,7 +3,7 @@ Health check endpoint.
 """
 
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List
 
 router = APIRouter(tags=["health"])
@@ -12,6 +12,10 @@ router = APIRouter(tags=["health"])
 class ModelInfo(BaseModel):
     """Information about a loaded model."""
 
+    model_config = ConfigDict(
+        defer_build=True, extra="ignore", validate_assignment=False
+    )
+
     name: str
     loaded: bool
     device: str
@@ -20,6 +24,10 @@ class ModelInfo(BaseModel):
 class HealthResponse(BaseModel):
     """Health check response."""
 
+    model_config = ConfigDict(
+        defer_build=True, extra="ignore", validate_assignment=False
+    )
+
     status: str
     models: List[ModelInfo]
 
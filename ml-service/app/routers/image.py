@@ -2,36 +2,70 @@
 Image detection endpoint.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional
-import httpx
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, TYPE_CHECKING
+import asyncio
+import msgspec
+import pybase64
 from PIL import Image
 import io
-import base64
+
+# httpx is only needed when an image_url request arrives — import lazily
+# so it stays off the app-import critical path
+if TYPE_CHECKING:
+    import httpx
 
 from ..config import get_settings
 
 router = APIRouter(prefix="/api", tags=["image"])
 
+# Bind hot-path limits once at import time; settings never change at runtime
+_settings = get_settings()
+_DOWNLOAD_TIMEOUT = _settings.download_timeout_seconds
+_MAX_IMAGE_SIZE_MB = _settings.max_image_size_mb
+_MAX_IMAGE_BYTES = int(_MAX_IMAGE_SIZE_MB * 1024 * 1024)
 
-class ImageDetectRequest(BaseModel):
-    """Request body for image detection."""
 
-    image_url: Optional[str] = Field(None, description="URL of the image to analyze")
-    image_base64: Optional[str] = Field(
-        None, description="Base64-encoded image data"
-    )
+class ImageDetectBody(msgspec.Struct):
+    """
+    Request body for image detection.
+
+    Decoded with msgspec directly from the raw body — image_base64 payloads
+    are large, and msgspec avoids the Pydantic validation pass (and its
+    string copy) that FastAPI's dependency-injection parsing would add.
+    """
+
+    image_url: Optional[str] = None
+    image_base64: Optional[str] = None
+
+
+_image_body_decoder = msgspec.json.Decoder(ImageDetectBody)
 
 
 class ImageDetectResponse(BaseModel):
-    """Response from image detection."""
+    """
+    Response from image detection.
 
-    score: float = Field(..., description="AI probability score (0=human, 1=AI)")
-    confidence: float = Field(
-        ..., description="Model confidence in the prediction (0-1)"
+    Documents the wire format; the endpoint returns the dict directly
+    (without response_model) to skip Pydantic revalidation of data we
+    just generated ourselves.
+
+    Fields:
+        score: AI probability score (0=human, 1=AI)
+        confidence: Model confidence in the prediction (0-1)
+        model: Name of the model used
+    """
+
+    model_config = ConfigDict(
+        defer_build=True, extra="ignore", validate_assignment=False
     )
-    model: str = Field(..., description="Name of the model used")
+
+    score: float
+    confidence: float
+    model: str
 
 
 # Global reference to detector (set by main.py)
@@ -44,46 +78,51 @@ def set_detector(detector):
     _detector = detector
 
 
-async def download_image(url: str) -> Image.Image:
-    """Download an image from URL."""
-    settings = get_settings()
-
-    async with httpx.AsyncClient(timeout=settings.download_timeout_seconds) as client:
-        try:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to download image: HTTP {e.response.status_code}",
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=400, detail=f"Failed to download image: {str(e)}"
-            )
-
-        # Check content type
-        content_type = response.headers.get("content-type", "")
-        if not content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=400, detail=f"URL does not point to an image: {content_type}"
-            )
-
-        # Check size
-        content_length = int(response.headers.get("content-length", 0))
-        max_size = int(settings.max_image_size_mb * 1024 * 1024)
-        if content_length > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Image too large: {content_length / 1024 / 1024:.1f}MB (max {settings.max_image_size_mb}MB)",
-            )
-
-        # Parse image
-        try:
-            image = Image.open(io.BytesIO(response.content))
-            return image
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+async def download_image(client: httpx.AsyncClient, url: str) -> Image.Image:
+    """Download an image from URL using the shared app-lifetime client."""
+    import httpx
+
+    try:
+        response = await client.get(
+            url, follow_redirects=True, timeout=_DOWNLOAD_TIMEOUT
+        )
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to download image: HTTP {e.response.status_code}",
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Failed to download image: {str(e)}"
+        )
+
+    # Check content type
+    content_type = response.headers.get("content-type", "")
+    if not content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=400, detail=f"URL does not point to an image: {content_type}"
+        )
+
+    # Check size
+    content_length = int(response.headers.get("content-length", 0))
+    if content_length > _MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image too large: {content_length / 1024 / 1024:.1f}MB (max {_MAX_IMAGE_SIZE_MB}MB)",
+        )
+
+    # Parse image
+    try:
+        image = Image.open(io.BytesIO(response.content))
+        # For JPEGs, ask libjpeg to decode directly toward the model's
+        # 224x224 input (IDCT scaling) and emit RGB, skipping most of the
+        # full-resolution decode we'd throw away anyway. No-op for other
+        # formats.
+        image.draft("RGB", (224, 224))
+        return image
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
 
 
 def decode_base64_image(data: str) -> Image.Image:
@@ -93,14 +132,19 @@ def decode_base64_image(data: str) -> Image.Image:
         if "," in data:
             data = data.split(",", 1)[1]
 
-        image_data = base64.b64decode(data)
-        return Image.open(io.BytesIO(image_data))
+        # SIMD base64 decode — ~5-10x faster than the stdlib on the large
+        # payloads this endpoint sees (full images, extracted frames)
+        image_data = pybase64.b64decode(data, validate=False)
+        image = Image.open(io.BytesIO(image_data))
+        # Decode JPEGs at reduced scale straight to RGB (see download_image)
+        image.draft("RGB", (224, 224))
+        return image
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid base64 image: {str(e)}")
 
 
-@router.post("/detect/image", response_model=ImageDetectResponse)
-async def detect_image(request: ImageDetectRequest):
+@router.post("/detect/image")
+async def detect_image(request: Request):
     """
     Detect if an image is AI-generated.
 
@@ -112,29 +156,45 @@ async def detect_image(request: ImageDetectRequest):
     if _detector is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
+    # Decode the raw body with msgspec (see ImageDetectBody)
+    try:
+        payload = _image_body_decoder.decode(await request.body())
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {e}")
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
     # Validate input
-    if request.image_url and request.image_base64:
+    if payload.image_url and payload.image_base64:
         raise HTTPException(
             status_code=400, detail="Provide either image_url or image_base64, not both"
         )
 
-    if not request.image_url and not request.image_base64:
+    if not payload.image_url and not payload.image_base64:
         raise HTTPException(
             status_code=400, detail="Must provide either image_url or image_base64"
         )
 
-    # Load image
-    if request.image_url:
-        image = await download_image(request.image_url)
+    # Load image. Base64 decode + JPEG parse is CPU-bound, so run it in
+    # the thread pool instead of blocking the event loop.
+    if payload.image_url:
+        image = await download_image(request.app.state.http, payload.image_url)
     else:
-        image = decode_base64_image(request.image_base64)
+        image = await asyncio.get_running_loop().run_in_executor(
+            None, decode_base64_image, payload.image_base64
+        )
 
-    # Run detection
+    # Run detection (concurrent requests are coalesced into one batched
+    # forward pass by the detector's micro-batching worker)
     try:
-        result = _detector.detect(image)
+        result = await _detector.detect_async(image)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
-    return ImageDetectResponse(
-        score=result.score, confidence=result.confidence, model=result.model_name
-    )
+    # Trusted data we just produced — return it directly (see
+    # ImageDetectResponse for the wire format)
+    return {
+        "score": result.score,
+        "confidence": result.confidence,
+        "model": result.model_name,
+    }
@@ -2,74 +2,169 @@
 Video frame extraction endpoint.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import List, Optional
-import httpx
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, TYPE_CHECKING
+import asyncio
+import msgspec
+import pybase64
 import tempfile
 import os
-import cv2
-import base64
+
+# cv2 and httpx dominate this module's import time but are only needed
+# once a request is actually being served — import them lazily so app
+# startup (and the Railway health probe) doesn't wait on them
+if TYPE_CHECKING:
+    import httpx
 
 from ..config import get_settings
 
 router = APIRouter(prefix="/api", tags=["video"])
 
+# Bind hot-path limits once at import time; settings never change at runtime
+_settings = get_settings()
+_DOWNLOAD_TIMEOUT = _settings.download_timeout_seconds
+_MAX_VIDEO_SIZE_MB = _settings.max_video_size_mb
+_MAX_VIDEO_BYTES = int(_MAX_VIDEO_SIZE_MB * 1024 * 1024)
+_MAX_VIDEO_DURATION = _settings.max_video_duration_seconds
+_MAX_FRAMES_PER_VIDEO = _settings.max_frames_per_video
 
-class ExtractFramesRequest(BaseModel):
-    """Request body for frame extraction."""
+# JPEG encoding releases the GIL, so extracted frames encode in parallel
+# on separate cores while the (non-thread-safe) decode stays sequential
+_encode_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
 
-    video_url: str = Field(..., description="URL of the video to extract frames from")
-    max_frames: int = Field(
-        default=20, ge=1, le=60, description="Maximum number of frames to extract"
-    )
+
+def _encode_jpeg_b64(frame) -> str:
+    """Encode a frame as JPEG and return it base64-encoded."""
+    import cv2
+
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    # SIMD base64 encode straight to str, skipping the bytes->str decode
+    return pybase64.b64encode_as_string(buffer)
+
+
+class ExtractFramesBody(msgspec.Struct):
+    """
+    Request body for frame extraction.
+
+    Decoded with msgspec directly from the raw body to skip FastAPI's
+    dependency-injection parsing and Pydantic validation on the hot path.
+    max_frames must be between 1 and 60 (checked in the handler).
+    """
+
+    video_url: str
+    max_frames: int = 20
+
+
+_frames_body_decoder = msgspec.json.Decoder(ExtractFramesBody)
 
 
 class ExtractFramesResponse(BaseModel):
-    """Response from frame extraction."""
+    """
+    Response from frame extraction.
+
+    Documents the wire format; the endpoint returns the dict directly
+    (without response_model) to skip Pydantic revalidation of data we
+    just generated ourselves.
+
+    Fields:
+        frame_base64: Base64-encoded frame images (JPEG)
+        fps: Video frames per second
+        duration: Video duration in seconds
+        total_frames: Total frames in video
+        extracted_count: Number of frames extracted
+    """
 
-    frame_base64: List[str] = Field(
-        ..., description="Base64-encoded frame images (JPEG)"
+    model_config = ConfigDict(
+        defer_build=True, extra="ignore", validate_assignment=False
     )
-    fps: float = Field(..., description="Video frames per second")
-    duration: float = Field(..., description="Video duration in seconds")
-    total_frames: int = Field(..., description="Total frames in video")
-    extracted_count: int = Field(..., description="Number of frames extracted")
 
+    frame_base64: List[str]
+    fps: float
+    duration: float
+    total_frames: int
+    extracted_count: int
 
-async def download_video(url: str) -> str:
-    """Download video to a temporary file."""
-    settings = get_settings()
 
-    async with httpx.AsyncClient(timeout=settings.download_timeout_seconds) as client:
-        try:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to download video: HTTP {e.response.status_code}",
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=400, detail=f"Failed to download video: {str(e)}"
-            )
+async def download_video(client: httpx.AsyncClient, url: str) -> str:
+    """
+    Download video to a temporary file using the shared app-lifetime client.
 
-        # Write to temporary file
-        suffix = ".mp4"  # Default extension
-        content_type = response.headers.get("content-type", "")
-        if "webm" in content_type:
-            suffix = ".webm"
-        elif "avi" in content_type:
-            suffix = ".avi"
-        elif "mov" in content_type or "quicktime" in content_type:
-            suffix = ".mov"
+    Streams the response body to disk in 1 MB chunks instead of buffering
+    the whole video in memory, and aborts the download as soon as the size
+    cap is exceeded rather than after fully buffering.
+    """
+    import httpx
 
-        temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-        temp_file.write(response.content)
-        temp_file.close()
+    temp_path: Optional[str] = None
+
+    try:
+        async with client.stream(
+            "GET", url, follow_redirects=True, timeout=_DOWNLOAD_TIMEOUT
+        ) as response:
+            response.raise_for_status()
 
-        return temp_file.name
+            # Reject oversized videos upfront when the server tells us
+            content_length = int(response.headers.get("content-length", 0))
+            if content_length > _MAX_VIDEO_BYTES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Video too large: {content_length / 1024 / 1024:.1f}MB (max {_MAX_VIDEO_SIZE_MB}MB)",
+                )
+
+            # Pick extension from content type
+            suffix = ".mp4"  # Default extension
+            content_type = response.headers.get("content-type", "")
+            if "webm" in content_type:
+                suffix = ".webm"
+            elif "avi" in content_type:
+                suffix = ".avi"
+            elif "mov" in content_type or "quicktime" in content_type:
+                suffix = ".mov"
+
+            temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+            temp_path = temp_file.name
+            try:
+                async for chunk in response.aiter_bytes(1 << 20):
+                    temp_file.write(chunk)
+                    # Enforce the cap incrementally so we stop pulling
+                    # bytes as soon as the video is too big
+                    if temp_file.tell() > _MAX_VIDEO_BYTES:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Video too large (max {_MAX_VIDEO_SIZE_MB}MB)",
+                        )
+            finally:
+                temp_file.close()
+
+    except httpx.HTTPStatusError as e:
+        _cleanup_temp_file(temp_path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to download video: HTTP {e.response.status_code}",
+        )
+    except httpx.RequestError as e:
+        _cleanup_temp_file(temp_path)
+        raise HTTPException(
+            status_code=400, detail=f"Failed to download video: {str(e)}"
+        )
+    except HTTPException:
+        _cleanup_temp_file(temp_path)
+        raise
+
+    return temp_path
+
+
+def _cleanup_temp_file(path: Optional[str]) -> None:
+    """Delete a partially written temp file, ignoring errors."""
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+        except Exception:
+            pass
 
 
 def extract_frames(video_path: str, max_frames: int) -> dict:
@@ -83,7 +178,7 @@ def extract_frames(video_path: str, max_frames: int) -> dict:
     Returns:
         Dict with frame data, fps, duration, and frame counts
     """
-    settings = get_settings()
+    import cv2
 
     cap = cv2.VideoCapture(video_path)
 
@@ -96,36 +191,49 @@ def extract_frames(video_path: str, max_frames: int) -> dict:
         duration = total_frames / fps if fps > 0 else 0
 
         # Check duration limit
-        if duration > settings.max_video_duration_seconds:
+        if duration > _MAX_VIDEO_DURATION:
             raise HTTPException(
                 status_code=400,
-                detail=f"Video too long: {duration:.1f}s (max {settings.max_video_duration_seconds}s)",
+                detail=f"Video too long: {duration:.1f}s (max {_MAX_VIDEO_DURATION}s)",
             )
 
         # Calculate frame interval for even sampling
-        actual_max_frames = min(max_frames, settings.max_frames_per_video, total_frames)
+        actual_max_frames = min(max_frames, _MAX_FRAMES_PER_VIDEO, total_frames)
         frame_interval = max(1, total_frames // actual_max_frames)
 
+        # Precompute the sampling schedule, then decode forward in a single
+        # pass. Random-access seeks (CAP_PROP_POS_FRAMES) force the decoder
+        # back to the previous keyframe for every sample on inter-frame
+        # codecs like H.264, re-decoding most of the video; a sequential
+        # grab() loop decodes each frame exactly once and only pays for the
+        # color conversion on retrieve() at sampled indices.
+        targets = set(range(0, total_frames, frame_interval)[:actual_max_frames])
+        last_target = max(targets) if targets else -1
+
+        # Decode sequentially (VideoCapture is not thread-safe), but fan the
+        # JPEG encodes out to the thread pool so they overlap with decoding
+        encode_jobs = []
+
+        idx = 0
+        while idx <= last_target and cap.grab():
+            if idx in targets:
+                ret, frame = cap.retrieve()
+                if ret:
+                    # Encode as JPEG off-thread. imencode expects BGR input
+                    # (VideoCapture's native order), so no color conversion
+                    # is needed — the old BGR->RGB pass swapped channels
+                    # before a codec that assumed BGR, costing a full-frame
+                    # copy and producing swapped colors.
+                    encode_jobs.append(
+                        (idx, _encode_pool.submit(_encode_jpeg_b64, frame))
+                    )
+            idx += 1
+
         frames_base64 = []
         frame_indices = []
-
-        for i in range(0, total_frames, frame_interval):
-            if len(frames_base64) >= actual_max_frames:
-                break
-
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = cap.read()
-
-            if not ret:
-                continue
-
-            # Convert BGR to RGB and encode as JPEG
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            _, buffer = cv2.imencode(".jpg", frame_rgb, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_base64 = base64.b64encode(buffer).decode("utf-8")
-
-            frames_base64.append(frame_base64)
-            frame_indices.append(i)
+        for frame_idx, job in encode_jobs:
+            frames_base64.append(job.result())
+            frame_indices.append(frame_idx)
 
         return {
             "frame_base64": frames_base64,
@@ -139,8 +247,8 @@ def extract_frames(video_path: str, max_frames: int) -> dict:
         cap.release()
 
 
-@router.post("/extract-frames", response_model=ExtractFramesResponse)
-async def extract_video_frames(request: ExtractFramesRequest):
+@router.post("/extract-frames")
+async def extract_video_frames(request: Request):
     """
     Extract frames from a video for AI detection analysis.
 
@@ -149,16 +257,32 @@ async def extract_video_frames(request: ExtractFramesRequest):
     Returns:
         Base64-encoded frame images along with video metadata
     """
+    # Decode the raw body with msgspec (see ExtractFramesBody)
+    try:
+        payload = _frames_body_decoder.decode(await request.body())
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {e}")
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+    if not 1 <= payload.max_frames <= 60:
+        raise HTTPException(
+            status_code=422, detail="max_frames must be between 1 and 60"
+        )
+
     video_path: Optional[str] = None
 
     try:
         # Download video
-        video_path = await download_video(request.video_url)
-
-        # Extract frames
-        result = extract_frames(video_path, request.max_frames)
-
-        return ExtractFramesResponse(**result)
+        video_path = await download_video(request.app.state.http, payload.video_url)
+
+        # Extract frames off the event loop — decode + encode is CPU-bound
+        # and would otherwise stall every other in-flight request. Trusted
+        # data we just produced, returned directly (see
+        # ExtractFramesResponse for the wire format).
+        return await asyncio.get_running_loop().run_in_executor(
+            None, extract_frames, video_path, payload.max_frames
+        )
 
     finally:
         # Clean up temporary file
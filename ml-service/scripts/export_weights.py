@@ -0,0 +1,36 @@
+"""
+Export ResNet50 ImageNet weights to safetensors for fast startup.
+
+Run at Docker build time so the runtime image ships with a weight file
+that can be mmap'd directly (demand-paged, no pickle.load or tensor
+rebuild), instead of downloading and unpickling a ~100 MB .pth on every
+container boot.
+
+Usage:
+    python scripts/export_weights.py [output_path]
+"""
+
+import sys
+
+from safetensors.torch import save_file
+from torchvision.models import resnet50, ResNet50_Weights
+
+DEFAULT_OUTPUT = "/models/resnet50.safetensors"
+
+
+def main() -> None:
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT
+
+    print("Downloading ResNet50 ImageNet weights...")
+    model = resnet50(weights=ResNet50_Weights.IMAGENET1K_V2)
+
+    # safetensors rejects shared storage; clone to be safe
+    state_dict = {k: v.clone().contiguous() for k, v in model.state_dict().items()}
+
+    print(f"Saving weights to {output_path}...")
+    save_file(state_dict, output_path)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()